@@ -1,4 +1,5 @@
 import math
+import sys
 from typing import BinaryIO, Iterable, List
 
 from bft.core.yaml_parser import BaseYamlParser, BaseYamlVisitor
@@ -42,14 +43,16 @@ class CaseFileVisitor(BaseYamlVisitor[CaseFile]):
 
     def visit_literal(self, lit):
         value = self._get_or_die(lit, "value")
-        data_type = self._get_or_die(lit, "type")
+        # types come from a small closed set, interning them keeps the dialect
+        # kernel lookups keyed on type strings down to pointer compares
+        data_type = sys.intern(self._get_or_die(lit, "type"))
         is_not_a_func_arg = self._get_or_else(lit, "is_not_a_func_arg", False)
         value = self.__normalize_yaml_literal(value, data_type)
         return CaseLiteral(value, data_type, is_not_a_func_arg)
 
     def visit_literal_result(self, lit):
         value = self._get_or_die(lit, "value")
-        data_type = self._get_or_die(lit, "type")
+        data_type = sys.intern(self._get_or_die(lit, "type"))
         value = self.__normalize_yaml_literal(value, data_type)
         return CaseLiteral(value, data_type)
 
@@ -1,4 +1,4 @@
-from typing import Dict, List, Literal, NamedTuple, Tuple
+from typing import Any, Dict, List, Literal, NamedTuple, Tuple
 
 
 class CaseLiteral(NamedTuple):
@@ -18,7 +18,7 @@ class Case(NamedTuple):
     group: CaseGroup
     args: List[CaseLiteral]
     result: CaseLiteral | Literal["error", "undefined"]
-    options: List[Tuple[str, str]]
+    options: List[Tuple[str, Any]]
 
 
 def case_to_kernel_str(
@@ -1,3 +1,5 @@
+import sys
+
 from bft.core.yaml_parser import BaseYamlParser, BaseYamlVisitor
 from bft.dialects.types import DialectFile, DialectFunction, DialectKernel, short_type_to_type
 
@@ -8,14 +10,15 @@ class DialectFileVisitor(BaseYamlVisitor[DialectFile]):
         arg_types = []
         if kernel != '':
             arg_types = [DialectFileVisitor.get_long_type(arg_type) for arg_type in kernel.split("_")]
-        return DialectKernel(arg_types, any)
+        # dialect kernels only list argument types, the result type is not recorded
+        return DialectKernel(arg_types, None)
 
     @staticmethod
     def get_long_type(short_type):
         long_type = short_type_to_type.get(short_type, None)
         if long_type is None:
-            return short_type
-        return long_type
+            return sys.intern(short_type)
+        return sys.intern(long_type)
 
     @staticmethod
     def _get_unqualified_func_name(name):
@@ -1,5 +1,8 @@
+import functools
 import os
-from typing import Dict, List, NamedTuple
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, NamedTuple, Sequence, Set, Tuple
 
 import pytest
 
@@ -55,15 +58,89 @@ type_to_short_type = {
     'geometry': 'geometry',
 }
 
-short_type_to_type = {st: lt for lt, st in type_to_short_type.items()}
+# Several long types share a short name (e.g. fixedchar<N> and fixedchar are both
+# fchar).  Dialect files always mean the unparameterized base type.
+short_type_to_type: Dict[str, str] = {
+    'req': 'required enumeration',
+    'i8': 'i8',
+    'i16': 'i16',
+    'i32': 'i32',
+    'i64': 'i64',
+    'fp32': 'fp32',
+    'fp64': 'fp64',
+    'str': 'string',
+    'vbin': 'binary',
+    'bool': 'boolean',
+    'ts': 'timestamp',
+    'tstz': 'timestamp_tz',
+    'date': 'date',
+    'time': 'time',
+    'iyear': 'interval_year',
+    'iday': 'interval_day',
+    'uuid': 'uuid',
+    'fchar': 'fixedchar',
+    'vchar': 'varchar',
+    'fbin': 'fixedbinary',
+    'dec': 'decimal',
+    'pts': 'precision_timestamp',
+    'ptstz': 'precision_timestamp_tz',
+    'struct': 'struct',
+    'list': 'list',
+    'map': 'map',
+    'any': 'any',
+    'any1': 'any1',
+    'any2': 'any2',
+    'any3': 'any3',
+    'u!name': 'user defined type',
+    'geometry': 'geometry',
+}
+
+if __debug__:
+    assert set(short_type_to_type) == set(type_to_short_type.values())
+    assert set(short_type_to_type.values()) <= set(type_to_short_type)
+
+# Every type name is mapped to a small integer id so kernels can be matched by
+# comparing tuples of ints instead of walking type strings one by one
+_type_ids: Dict[str, int] = {}
+# ids of the any types (any, any1, ...) which match any type supported by the dialect
+_any_type_ids: Set[int] = set()
+
+
+def _type_id(type_name: str) -> int:
+    type_id = _type_ids.get(type_name)
+    if type_id is None:
+        type_id = _type_ids[type_name] = len(_type_ids)
+        # any types are recognised here, once per distinct type name, so the kernel
+        # match loop never looks at type strings
+        if type_name.startswith("any"):
+            _any_type_ids.add(type_id)
+    return type_id
+
+
+for _type_name in type_to_short_type:
+    _type_id(_type_name)
+
 
+@functools.lru_cache(maxsize=None)
+def _base_type_id(type_name: str) -> int:
+    # dialect supports base type and function support is checked against base type.
+    # if type is a parametrized type (e.g. decimal<38, 1>), get the base type (e.g. decimal)
+    # else type is base type
+    return _type_id(type_name.split("<")[0].strip() if "<" in type_name else type_name)
 
-class DialectKernel(NamedTuple):
+
+@dataclass(slots=True, frozen=True)
+class DialectKernel:
     arg_types: List[str]
-    result_type: str
+    result_type: str | None
+
 
+# local_name, infix, postfix, between, aggregate, unsupported, extract
+_SqlMappingTemplate = Tuple[str, bool, bool, bool, bool, bool, bool]
 
-class DialectFunction(NamedTuple):
+
+@dataclass(slots=True, frozen=True)
+class DialectFunction:
     name: str
     local_name: str
     infix: bool
@@ -72,9 +149,38 @@ class DialectFunction(NamedTuple):
     aggregate: bool
     unsupported: bool
     extract: bool
-    required_options: Dict[str, str]
+    # values come straight from YAML so they are not always strings (e.g. lookaround: false)
+    required_options: Dict[str, Any]
     variadic_min: int
     supported_kernels: List[DialectKernel]
+    # The first seven SqlMapping fields for a case that fails on options (and passes)
+    # or on its kernel (which always reports the function as unsupported)
+    _mapping_template: _SqlMappingTemplate = field(init=False, repr=False, compare=False)
+    _kernel_failure_template: _SqlMappingTemplate = field(init=False, repr=False, compare=False)
+    # every case that passes maps to the same SqlMapping
+    _success_mapping: "SqlMapping" = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # frozen dataclass, so the derived fields have to bypass __setattr__
+        object.__setattr__(self, "_mapping_template", (
+            self.local_name,
+            self.infix,
+            self.postfix,
+            self.between,
+            self.aggregate,
+            self.unsupported,
+            self.extract,
+        ))
+        object.__setattr__(self, "_kernel_failure_template", (
+            self.local_name,
+            self.infix,
+            self.postfix,
+            self.between,
+            self.aggregate,
+            True,
+            self.extract,
+        ))
+        object.__setattr__(self, "_success_mapping", SqlMapping(*self._mapping_template, True, None))
 
 
 class DialectFile(NamedTuple):
@@ -98,161 +204,263 @@ class SqlMapping(NamedTuple):
     reason: str
 
 
+_EMPTY_KERNEL_SET: frozenset[Tuple[str, ...]] = frozenset()
+
+
+class _KernelSignature(NamedTuple):
+    arity: int
+    arg_ids: Tuple[int, ...]
+    # positions of the concrete types in the kernel and their type ids
+    concrete_idx: Tuple[int, ...]
+    concrete_ids: Tuple[int, ...]
+    # positions of the any types in the kernel and the group each one belongs to.  Any
+    # types with the same name (e.g. two any1) must match the same case type.
+    any_idx: Tuple[int, ...]
+    any_group: Tuple[int, ...]
+    n_any_groups: int
+
+
+@functools.lru_cache(maxsize=None)
+def _kernel_signature(arg_ids: Tuple[int, ...]) -> _KernelSignature:
+    concrete_idx, concrete_ids, any_idx, any_group = [], [], [], []
+    groups: Dict[int, int] = {}
+    for i, type_id in enumerate(arg_ids):
+        if type_id in _any_type_ids:
+            any_idx.append(i)
+            any_group.append(groups.setdefault(type_id, len(groups)))
+        else:
+            concrete_idx.append(i)
+            concrete_ids.append(type_id)
+    return _KernelSignature(
+        len(arg_ids),
+        arg_ids,
+        tuple(concrete_idx),
+        tuple(concrete_ids),
+        tuple(any_idx),
+        tuple(any_group),
+        len(groups),
+    )
+
+
+def _signature_for_kernel(kernel: DialectKernel) -> _KernelSignature:
+    return _kernel_signature(tuple(_type_id(t) for t in kernel.arg_types))
+
+
+def _signatures_by_arity(dfunc: DialectFunction) -> Dict[int, List[_KernelSignature]]:
+    by_arity: Dict[int, List[_KernelSignature]] = {}
+    for kernel in dfunc.supported_kernels:
+        signature = _signature_for_kernel(kernel)
+        by_arity.setdefault(signature.arity, []).append(signature)
+    return by_arity
+
+
+def _matches_wildcard_signature(
+        signature: _KernelSignature, case_ids: Tuple[int, ...], supported_type_ids: frozenset[int]
+) -> bool:
+    for i, type_id in zip(signature.concrete_idx, signature.concrete_ids):
+        if case_ids[i] != type_id:
+            return False
+    groups: List[int | None] = [None] * signature.n_any_groups
+    for i, group in zip(signature.any_idx, signature.any_group):
+        case_id = case_ids[i]
+        bound = groups[group]
+        if bound is None:
+            # if supported argument type is any(i.e. allows all type supported by dialect),
+            # check if the case type is one of the supported type by dialect
+            if case_id not in supported_type_ids:
+                return False
+            groups[group] = case_id
+        elif bound != case_id:
+            return False
+    return True
+
+
+# Upper bound on the number of distinct case signatures remembered per dialect
+_MAPPING_CACHE_SIZE = 4096
+
+
+def _case_signature(case: Case) -> Hashable:
+    # everything mapping_for_case looks at, so two cases with the same signature
+    # always map to the same SqlMapping
+    result = case.result
+    result_sig = result if isinstance(result, str) else result.type
+    return (
+        case.base_uri,
+        case.function,
+        tuple((arg.type, arg.is_not_a_func_arg) for arg in case.args),
+        result_sig,
+        # option values are keyed with their type since values like 1, True and 1.0 hash
+        # and compare equal but are reported differently in failure reasons
+        tuple((opt, type(val), val) for opt, val in case.options),
+    )
+
+
 class Dialect(object):
     def __init__(self, dialect_file: DialectFile):
         self.name = dialect_file.name
         self.supported_types = dialect_file.supported_types
-        self.__scalar_functions_by_name: Dict[str, DialectFunction] = {
+        # scalar and aggregate functions share one map, dfunc.aggregate tells them apart
+        self.__functions_by_name: Dict[str, DialectFunction] = {
             f.name: f for f in dialect_file.scalar_functions
         }
-        self.__aggregate_functions_by_name: Dict[str, DialectFunction] = {
-            f.name: f for f in dialect_file.aggregate_functions
-        }
+        for f in dialect_file.aggregate_functions:
+            if f.name in self.__functions_by_name:
+                raise Exception(
+                    f"The dialect {self.name} defines {f.name} as both a scalar and an aggregate function"
+                )
+            self.__functions_by_name[f.name] = f
         self.__func_prefixes: Dict[str, str] = {
             uri: prefix for uri, prefix in dialect_file.uri_to_func_prefix.items()
         }
+        # (base_uri, function) -> qualified function name, there are only a handful of these
+        self.__function_names: Dict[Tuple[str, str], str] = {}
+        self.__supported_type_ids: frozenset[int] = frozenset(_type_id(t) for t in self.supported_types)
+        self.__signatures: Dict[str, Dict[int, List[_KernelSignature]]] = {
+            name: _signatures_by_arity(f) for name, f in self.__functions_by_name.items()
+        }
+        # variadic functions check every kernel regardless of the number of arguments
+        self.__variadic_signatures: Dict[str, List[_KernelSignature]] = {
+            name: [_signature_for_kernel(k) for k in f.supported_kernels]
+            for name, f in self.__functions_by_name.items()
+            if f.variadic_min != -1
+        }
+        self.__sorted_required_options: Dict[str, List[Tuple[str, Any]]] = {
+            name: sorted((opt, val) for opt, val in f.required_options.items() if val is not None)
+            for name, f in self.__functions_by_name.items()
+        }
+        self.__mapping_cache: OrderedDict[Hashable, SqlMapping] = OrderedDict()
+        self.__kernel_sets: Dict[str, frozenset[Tuple[str, ...]]] = {
+            f.name: frozenset(tuple(k.arg_types) for k in f.supported_kernels)
+            for f in dialect_file.scalar_functions
+        }
 
     def __supports_case_kernel(
             self,
             dfunc: DialectFunction,
             args: List[CaseLiteral],
             result: CaseLiteral | Literal["error", "undefined"],
-    ):
-        arg_len_matched = False
-        # figure out if case is a supported kernel. walk over each supported kernel and check if any kernel
-        # matches the case arguments type
-        for supported_kernel in dfunc.supported_kernels:
-            if dfunc.aggregate:
-                arg_len = 1
-                if len(args) == 0 or args[0].is_not_a_func_arg:
-                    arg_len = 0
-            else:
-                arg_len = len(args)
-            if len(supported_kernel.arg_types) != arg_len and dfunc.variadic_min == -1:
+    ) -> str | None:
+        n_args = len(args)
+        if dfunc.aggregate:
+            arg_len = 1
+            if n_args == 0 or args[0].is_not_a_func_arg:
+                arg_len = 0
+        else:
+            arg_len = n_args
+        variadic = dfunc.variadic_min != -1
+        candidates: Sequence[_KernelSignature]
+        if variadic:
+            candidates = self.__variadic_signatures[dfunc.name]
+        else:
+            candidates = self.__signatures[dfunc.name].get(arg_len, ())
+        arg_len_matched = len(candidates) > 0
+
+        # figure out if case is a supported kernel. walk over each candidate kernel and check if any kernel
+        # matches the case arguments type. Only the leading arguments shared by the kernel and the case
+        # are compared.
+        arg_ids = tuple(_base_type_id(arg.type) for arg in args)
+        case_ids = arg_ids if variadic or arg_len == n_args else arg_ids[:arg_len]
+        for signature in candidates:
+            kernel_case_ids = case_ids
+            if variadic and signature.arity != n_args:
+                if signature.arity == 1:
+                    # a single type variadic kernel applies to every argument
+                    signature = _kernel_signature(signature.arg_ids * n_args)
+                elif signature.arity > n_args:
+                    signature = _kernel_signature(signature.arg_ids[:n_args])
+                else:
+                    kernel_case_ids = arg_ids[:signature.arity]
+            if not signature.any_idx:
+                if signature.arg_ids == kernel_case_ids:
+                    return None
                 continue
-            arg_len_matched = True
-            matched = True
-            kernel_arg_types = supported_kernel.arg_types
-            if dfunc.variadic_min != -1 and len(supported_kernel.arg_types) == 1:
-                kernel_arg_types = supported_kernel.arg_types * len(args)
-
-            any_map = {}
-            for ktype, arg in zip(kernel_arg_types, args):
-                arg_type = arg.type
-                # dialect supports base type and function support is checked against base type.
-                # get base type:
-                # if type is a parametrized type (e.g. decimal<38, 1>), get the base type (e.g. decimal)
-                # else type is base type
-                type_to_check = arg_type.split("<")[0].strip() if "<" in arg_type else arg_type
-                if type_to_check != ktype and not ktype.startswith("any"):
-                    matched = False
-                    break
-                # if supported argument type is any(i.e. allows all type supported by dialect),
-                # check if the case type is one of the supported type by dialect
-                if ktype.startswith("any"):
-                    if ktype not in any_map:
-                        if type_to_check not in self.supported_types:
-                            matched = False
-                            break
-                        any_map[ktype] = type_to_check
-                    elif any_map[ktype] != type_to_check:
-                        matched = False
-                        break
-            if matched:
+            if _matches_wildcard_signature(signature, kernel_case_ids, self.__supported_type_ids):
                 return None
 
         if not arg_len_matched:
             raise Exception("Unreachable path.  Supported kernel with different # of types than case")
         return f"The dialect {self.name} does not support the kernel {case_to_kernel_str(dfunc.name, args, result)}"
 
-    def __supports_options(self, dfunc: DialectFunction, case: Case):
-        for case_opt, case_val in case.options:
-            dval = dfunc.required_options.get(case_opt)
-            if dval is None:
-                # If the dialect does not require an option we assume it supports all values
-                continue
-            if dval != case_val:
-                return f"The dialect {self.name} expects {case_opt}={dval} but {case_opt}={case_val} was requested"
+    def __supports_options(self, dfunc: DialectFunction, case: Case) -> str | None:
+        # If the dialect does not require an option we assume it supports all values
+        required = self.__sorted_required_options[dfunc.name]
+        if not required or not case.options:
+            return None
+        # Walk whichever side is smaller.  Case options are sorted by name so walking the
+        # sorted required options reports the same first mismatch.
+        if len(case.options) <= len(required):
+            for case_opt, case_val in case.options:
+                dval = dfunc.required_options.get(case_opt)
+                if dval is not None and dval != case_val:
+                    return self.__option_failure(case_opt, dval, case_val)
+        else:
+            case_opts = dict(case.options)
+            for opt, dval in required:
+                if opt in case_opts and dval != case_opts[opt]:
+                    return self.__option_failure(opt, dval, case_opts[opt])
         return None
 
-    def required_options(self, function_name) -> Dict[str, str]:
-        dfunc = self.__scalar_functions_by_name.get(function_name, None)
-        if(not dfunc):
-            dfunc = self.__aggregate_functions_by_name.get(function_name, None)
-        return getattr(dfunc, "required_options", None)
+    def __option_failure(self, opt: str, dval: Any, case_val: Any) -> str:
+        return f"The dialect {self.name} expects {opt}={dval} but {opt}={case_val} was requested"
+
+    def required_options(self, function_name: str) -> Dict[str, Any] | None:
+        dfunc = self.__functions_by_name.get(function_name, None)
+        return dfunc.required_options if dfunc is not None else None
 
     def supports_kernel(self, function_name: str, kernel: Kernel) -> bool:
-        dfunc = self.__scalar_functions_by_name.get(function_name, None)
-        if dfunc is None:
-            return False
-        for supported_kernel in dfunc.supported_kernels:
-            if len(supported_kernel.arg_types) != len(kernel.arg_types):
-                continue
-            matched = True
-            for ktype, arg_type in zip(supported_kernel.arg_types, kernel.arg_types):
-                if arg_type != ktype:
-                    matched = False
-                    break
-            if matched:
-                return True
-        return False
+        return tuple(kernel.arg_types) in self.__kernel_sets.get(function_name, _EMPTY_KERNEL_SET)
+
+    @functools.cached_property
+    def _under_pytest(self) -> bool:
+        # checked lazily since the dialects fixture may be built before a test is running
+        return "PYTEST_CURRENT_TEST" in os.environ
 
     def _get_function_name(self, case: Case) -> str:
-        prefix = self.__func_prefixes.get(case.base_uri, "")
-        if len(prefix) > 0:
-            return prefix + "." + case.function
-        return case.function
+        key = (case.base_uri, case.function)
+        name = self.__function_names.get(key)
+        if name is None:
+            prefix = self.__func_prefixes.get(case.base_uri, "")
+            name = prefix + "." + case.function if len(prefix) > 0 else case.function
+            self.__function_names[key] = name
+        return name
+
+    def mapping_for_case(self, case: Case) -> SqlMapping | None:
+        key: Hashable | None = _case_signature(case)
+        try:
+            mapping = self.__mapping_cache.get(key)
+        except TypeError:
+            # option values come straight from YAML and may be unhashable (e.g. lists),
+            # such cases are just not cached
+            key = None
+            mapping = None
+        if mapping is not None:
+            self.__mapping_cache.move_to_end(key)
+            return mapping
 
-    def mapping_for_case(self, case: Case) -> SqlMapping:
         func_name = self._get_function_name(case)
-        dfunc_scalar = self.__scalar_functions_by_name.get(func_name, None)
-        dfunc_aggregate = self.__aggregate_functions_by_name.get(func_name, None)
-        dfunc = dfunc_scalar or dfunc_aggregate
-        if "PYTEST_CURRENT_TEST" not in os.environ:
-            if dfunc is None:
-                return None
-        elif dfunc is None:
-            pytest.skip(f"Skipping unsupported function. {case.base_uri}/{case.function}")
+        dfunc = self.__functions_by_name.get(func_name, None)
+        if dfunc is None:
+            if self._under_pytest:
+                pytest.skip(f"Skipping unsupported function. {case.base_uri}/{case.function}")
+            return None
+
+        mapping = self.__mapping_for_function(dfunc, case)
+        if key is not None:
+            self.__mapping_cache[key] = mapping
+            if len(self.__mapping_cache) > _MAPPING_CACHE_SIZE:
+                self.__mapping_cache.popitem(last=False)
+        return mapping
 
+    def __mapping_for_function(self, dfunc: DialectFunction, case: Case) -> SqlMapping:
         kernel_failure = self.__supports_case_kernel(dfunc, case.args, case.result)
         if kernel_failure is not None:
-            return SqlMapping(
-                dfunc.local_name,
-                dfunc.infix,
-                dfunc.postfix,
-                dfunc.between,
-                dfunc.aggregate,
-                True,
-                dfunc.extract,
-                False,
-                kernel_failure,
-            )
+            return SqlMapping(*dfunc._kernel_failure_template, False, kernel_failure)
 
         option_failure = self.__supports_options(dfunc, case)
         if option_failure is not None:
-            return SqlMapping(
-                dfunc.local_name,
-                dfunc.infix,
-                dfunc.postfix,
-                dfunc.between,
-                dfunc.aggregate,
-                dfunc.unsupported,
-                dfunc.extract,
-                False,
-                option_failure,
-            )
-
-        return SqlMapping(
-            dfunc.local_name,
-            dfunc.infix,
-            dfunc.postfix,
-            dfunc.between,
-            dfunc.aggregate,
-            dfunc.unsupported,
-            dfunc.extract,
-            True,
-            None,
-        )
+            return SqlMapping(*dfunc._mapping_template, False, option_failure)
+
+        return dfunc._success_mapping
 
 
 class DialectsLibrary(object):
@@ -0,0 +1,196 @@
+from typing import List, Sequence
+
+import pytest
+
+import bft.dialects.types
+from bft.cases.types import Case, CaseGroup, CaseLiteral
+from bft.core.function import Kernel
+from bft.dialects.types import Dialect, DialectFile, DialectFunction, DialectKernel
+
+URI = "https://example.com/functions_test.yaml"
+
+
+def make_function(
+    name: str,
+    kernels: List[List[str]],
+    aggregate: bool = False,
+    variadic_min: int = -1,
+    required_options=None,
+) -> DialectFunction:
+    return DialectFunction(
+        f"test.{name}",
+        name,
+        False,
+        False,
+        False,
+        aggregate,
+        False,
+        False,
+        required_options or {},
+        variadic_min,
+        [DialectKernel(arg_types, None) for arg_types in kernels],
+    )
+
+
+def make_dialect(
+    scalar_functions: Sequence[DialectFunction] = (),
+    aggregate_functions: Sequence[DialectFunction] = (),
+    supported_types: Sequence[str] = ("i8", "i16", "i32", "string"),
+) -> Dialect:
+    return Dialect(
+        DialectFile(
+            "test",
+            "sql",
+            list(scalar_functions),
+            list(aggregate_functions),
+            {URI: "test"},
+            list(supported_types),
+        )
+    )
+
+
+def make_case(function: str, args: List[CaseLiteral], options=()) -> Case:
+    return Case(
+        function, URI, CaseGroup("basic", "Basic examples"), args, CaseLiteral(1, "i8"), list(options)
+    )
+
+
+def literals(*arg_types: str) -> List[CaseLiteral]:
+    return [CaseLiteral(1, arg_type) for arg_type in arg_types]
+
+
+def test_mapping_for_case_unhashable_options():
+    dialect = make_dialect([make_function("f", [["i8"]], required_options={"overflow": "SILENT"})])
+    case = make_case("f", literals("i8"), [("overflow", "SILENT"), ("values", [1, 2])])
+    for _ in range(2):
+        mapping = dialect.mapping_for_case(case)
+        assert mapping.should_pass
+        assert mapping.reason is None
+
+
+def test_mapping_for_case_equal_hash_option_values():
+    dialect = make_dialect([make_function("f", [["i8"]], required_options={"overflow": "SILENT"})])
+    for value in [1, True, 1.0]:
+        mapping = dialect.mapping_for_case(make_case("f", literals("i8"), [("overflow", value)]))
+        assert not mapping.should_pass
+        assert mapping.reason == (
+            f"The dialect test expects overflow=SILENT but overflow={value} was requested"
+        )
+
+
+def test_mapping_for_case_lru_eviction(monkeypatch):
+    monkeypatch.setattr(bft.dialects.types, "_MAPPING_CACHE_SIZE", 2)
+    dialect = make_dialect([make_function("f", [["i8"]])])
+    # failing mappings are built per lookup so identity tells whether the cache was hit
+    first, second, third = [make_case("f", literals(arg_type)) for arg_type in ("i16", "i32", "string")]
+
+    first_mapping = dialect.mapping_for_case(first)
+    second_mapping = dialect.mapping_for_case(second)
+    assert dialect.mapping_for_case(first) is first_mapping
+
+    # first was used most recently so second is evicted
+    dialect.mapping_for_case(third)
+    assert dialect.mapping_for_case(first) is first_mapping
+    second_again = dialect.mapping_for_case(second)
+    assert second_again is not second_mapping
+    assert second_again == second_mapping
+
+
+def supports(dialect: Dialect, function: str, args: List[CaseLiteral]) -> bool:
+    return dialect.mapping_for_case(make_case(function, args)).should_pass
+
+
+def test_fixed_arity_kernels():
+    dialect = make_dialect([make_function("add", [["i8", "i8"], ["decimal", "decimal"]])])
+    assert supports(dialect, "add", literals("i8", "i8"))
+    # parametrized types are checked against their base type
+    assert supports(dialect, "add", literals("decimal<38, 2>", "decimal<10, 0>"))
+    mapping = dialect.mapping_for_case(make_case("add", literals("i8", "i16")))
+    assert not mapping.should_pass
+    assert mapping.unsupported
+    assert mapping.reason == "The dialect test does not support the kernel test.add(i8, i16) -> i8"
+
+
+def test_kernel_arity_mismatch_is_unreachable():
+    dialect = make_dialect([make_function("add", [["i8", "i8"]])])
+    with pytest.raises(Exception, match="Unreachable path"):
+        dialect.mapping_for_case(make_case("add", literals("i8")))
+
+
+def test_variadic_single_type_kernel_repeats_for_every_argument():
+    dialect = make_dialect([make_function("concat", [["string"]], variadic_min=1)])
+    assert supports(dialect, "concat", literals("string"))
+    assert supports(dialect, "concat", literals("string", "string", "string"))
+    assert supports(dialect, "concat", [])
+    assert not supports(dialect, "concat", literals("string", "i8", "string"))
+
+
+def test_variadic_kernel_longer_than_case_is_truncated():
+    dialect = make_dialect([make_function("f", [["string", "string", "i8"]], variadic_min=1)])
+    assert supports(dialect, "f", literals("string", "string"))
+    assert not supports(dialect, "f", literals("string", "i8"))
+
+
+def test_variadic_kernel_shorter_than_case_compares_prefix():
+    dialect = make_dialect([make_function("f", [["string", "i8"]], variadic_min=1)])
+    assert supports(dialect, "f", literals("string", "i8", "fp64"))
+    assert not supports(dialect, "f", literals("i8", "i8", "fp64"))
+
+
+def test_variadic_any_kernel_binds_one_type():
+    dialect = make_dialect([make_function("coalesce", [["any1"]], variadic_min=2)])
+    assert supports(dialect, "coalesce", literals("i8", "i8", "i8"))
+    assert not supports(dialect, "coalesce", literals("i8", "i16"))
+    # any types only match types supported by the dialect
+    assert not supports(dialect, "coalesce", literals("fp64", "fp64"))
+
+
+def test_any_group_binding():
+    dialect = make_dialect([
+        make_function("same", [["any1", "any1"]]),
+        make_function("pair", [["any1", "any2", "any1"]]),
+        make_function("mixed", [["any1", "i8"]]),
+        make_function("other", [["any4", "any4"]]),
+    ])
+    assert supports(dialect, "same", literals("i16", "i16"))
+    assert not supports(dialect, "same", literals("i16", "i32"))
+    assert supports(dialect, "pair", literals("i8", "string", "i8"))
+    assert not supports(dialect, "pair", literals("i8", "string", "string"))
+    assert supports(dialect, "mixed", literals("string", "i8"))
+    assert not supports(dialect, "mixed", literals("string", "i16"))
+    # every any* name is a wildcard, not just any..any3
+    assert supports(dialect, "other", literals("i32", "i32"))
+    assert not supports(dialect, "other", literals("i32", "i8"))
+
+
+def test_aggregate_arity():
+    dialect = make_dialect(aggregate_functions=[make_function("count", [[], ["any"]], aggregate=True)])
+    assert supports(dialect, "count", literals("i8"))
+    # only the first argument is a function argument for aggregates
+    assert supports(dialect, "count", literals("i8", "fp64"))
+    assert not supports(dialect, "count", literals("fp64"))
+    # arguments that only populate test data select the zero argument kernel
+    assert supports(dialect, "count", [CaseLiteral(1, "fp64", True)])
+    assert supports(dialect, "count", [])
+
+
+def test_variadic_aggregate_compares_every_argument():
+    dialect = make_dialect(
+        aggregate_functions=[make_function("agg", [["i8", "string"]], aggregate=True, variadic_min=1)]
+    )
+    assert supports(dialect, "agg", literals("i8", "string"))
+    assert not supports(dialect, "agg", literals("i8", "i8"))
+
+
+def test_supports_kernel():
+    dialect = make_dialect([make_function("add", [["i8", "i8"], ["any1", "any1"]])])
+    assert dialect.supports_kernel("test.add", Kernel(["i8", "i8"], "i8", [], None))
+    # kernels from extension files are compared literally
+    assert dialect.supports_kernel("test.add", Kernel(["any1", "any1"], "any1", [], None))
+    assert not dialect.supports_kernel("test.add", Kernel(["i16", "i16"], "i16", [], None))
+    assert not dialect.supports_kernel("test.missing", Kernel(["i8", "i8"], "i8", [], None))
+
+
+def test_function_defined_as_scalar_and_aggregate():
+    with pytest.raises(Exception, match="defines test.f as both a scalar and an aggregate function"):
+        make_dialect([make_function("f", [["i8"]])], [make_function("f", [["i8"]], aggregate=True)])
@@ -5,6 +5,11 @@ from typing import Dict, List, MutableSet, NamedTuple
 import yaml
 from jinja2 import Environment, PackageLoader, select_autoescape
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 from bft.cases.loader import load_cases
 from bft.cases.types import Case
 from bft.core.function import FunctionDefinition, Kernel, Option
@@ -64,8 +69,8 @@ def replace_pattern_sequences(content, dir_path):
                                 "supplemental file requires it.")
 
     # Load YAML file
-    with open(def_path, 'r') as yaml_file:
-        data = yaml.safe_load(yaml_file)
+    with open(def_path, 'rb') as yaml_file:
+        data = yaml.load(yaml_file, SafeLoader)
 
     # Search and replace pattern sequences
     matches = re.finditer(pattern, content)
@@ -121,7 +126,9 @@ def create_examples(cases: List[Case]) -> List[FunctionExampleCaseInfo]:
 
 def create_example_groups(cases: List[Case]) -> List[FunctionExampleGroupInfo]:
     groups: Dict[str, Case] = {}
+    cases_by_group: Dict[str, List[Case]] = {}
     for case in cases:
+        cases_by_group.setdefault(case.group.id, []).append(case)
         # This may clobber previous insertions.  We just need one prototypical case per group
         # Prefer a case that actually has a typed result if possible
         if case.group.id not in groups or hasattr(case.result, "type"):
@@ -137,9 +144,8 @@ def create_example_groups(cases: List[Case]) -> List[FunctionExampleGroupInfo]:
             result_type = protocase.result.type
         else:
             result_type = protocase.result
-        group_cases = [c for c in cases if c.group.id == group_id]
-        for case in group_cases:
-            ordered_cases.append(case)
+        group_cases = cases_by_group[group_id]
+        ordered_cases.extend(group_cases)
         examples = create_examples(group_cases)
         description = protocase.group.description
         example_groups.append(
@@ -1,4 +1,5 @@
 import json
+from multiprocessing import Pool
 from pathlib import Path
 
 import yaml
@@ -14,15 +15,29 @@ CASES_DIR = BASE_DIR / "cases"
 FUNCTION_FOLDERS = Path(CASES_DIR).glob("*")
 
 
-for function_folder in FUNCTION_FOLDERS:
-    folder_path = CASES_DIR / function_folder.name
-    json_path = JSON_DIR / function_folder.name
-    Path(json_path).mkdir(parents=True, exist_ok=True)
-    function_yamls = Path(folder_path).rglob("*.yaml")
-    for function_yaml in function_yamls:
-        yaml_file = folder_path / function_yaml.name
-        json_file = json_path / function_yaml.stem
-        with open(yaml_file) as f:
-            dataMap = yaml.load(f, SafeLoader)
-            with open(f"{json_file}.json", "w") as outfile:
-                outfile.write('{}\n'.format(json.dumps(dataMap, indent=4)))
+def convert(yaml_file: Path, json_file: Path):
+    with open(yaml_file, "rb") as f:
+        dataMap = yaml.load(f, SafeLoader)
+        with open(f"{json_file}.json", "w") as outfile:
+            outfile.write('{}\n'.format(json.dumps(dataMap, indent=4)))
+
+
+def main():
+    conversions = []
+    for function_folder in FUNCTION_FOLDERS:
+        folder_path = CASES_DIR / function_folder.name
+        json_path = JSON_DIR / function_folder.name
+        Path(json_path).mkdir(parents=True, exist_ok=True)
+        function_yamls = Path(folder_path).rglob("*.yaml")
+        for function_yaml in function_yamls:
+            yaml_file = folder_path / function_yaml.name
+            json_file = json_path / function_yaml.stem
+            conversions.append((yaml_file, json_file))
+
+    # every file converts independently so spread them over all cores
+    with Pool() as pool:
+        pool.starmap(convert, conversions)
+
+
+if __name__ == "__main__":
+    main()